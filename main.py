@@ -12,10 +12,42 @@ License: MIT
 
 import asyncio
 import argparse
+import hashlib
+import inspect
+import json
 import logging
+import math
+import signal
 import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+import numpy as np
+
+# Optional performance extras
+try:
+    import numpy_rms
+except ImportError:
+    numpy_rms = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Core MCP and FastMCP imports
 from mcp.server.fastmcp import FastMCP, Context
@@ -23,7 +55,9 @@ from mcp.server.fastmcp.resources import Resource
 
 # Local imports
 from src.audio.capture import AudioCapture, AudioDevice
+from src.audio._kernels import NUMBA_AVAILABLE, preprocess, warmup as warmup_kernels
 from src.audio.vad import VoiceActivityDetector
+from src.stt.batcher import STTBatcher
 from src.stt.engine_manager import STTEngineManager
 from src.config.manager import ConfigManager
 from src.utils.logger import setup_logger
@@ -36,26 +70,126 @@ mcp = FastMCP(
     version="1.0.0"
 )
 
+
+@dataclass(frozen=True, slots=True)
+class AudioCfg:
+    """Audio capture settings resolved once from configuration."""
+    sample_rate: int
+    channels: int
+    chunk_size: int
+    device_id: Optional[int]
+    low_latency: bool
+    wasapi_buffer_frames: int
+    event_callback: bool
+    exclusive_mode: bool
+    
+    @classmethod
+    def from_config(cls, audio_config: Dict[str, Any]) -> "AudioCfg":
+        return cls(
+            sample_rate=audio_config.get("sample_rate", 16000),
+            channels=audio_config.get("channels", 1),
+            chunk_size=audio_config.get("chunk_size", 1024),
+            device_id=audio_config.get("device_id"),
+            low_latency=audio_config.get("low_latency", True),
+            wasapi_buffer_frames=audio_config.get("wasapi_buffer_frames", 256),
+            event_callback=audio_config.get("event_callback", True),
+            exclusive_mode=audio_config.get("use_wasapi_exclusive", False)
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class VadCfg:
+    """Voice activity detection settings resolved once from configuration."""
+    mode: str
+    aggressiveness: int
+    energy_threshold: float
+    min_silence_duration: float
+    
+    @classmethod
+    def from_config(cls, vad_config: Dict[str, Any]) -> "VadCfg":
+        return cls(
+            mode=vad_config.get("mode", "hybrid"),
+            aggressiveness=vad_config.get("webrtc_aggressiveness", 2),
+            energy_threshold=vad_config.get("energy_threshold", 0.01),
+            min_silence_duration=vad_config.get("min_silence_duration", 0.3)
+        )
+
+
+def _wasapi_options(cfg: AudioCfg) -> Dict[str, Any]:
+    """WASAPI stream options supported by the installed AudioCapture.
+    
+    Older capture backends do not take these arguments, so only the ones
+    named in the constructor signature (or all of them, if it accepts
+    ``**kwargs``) are passed through.
+    """
+    options = {
+        "wasapi_buffer_frames": cfg.wasapi_buffer_frames,
+        "event_callback": cfg.event_callback,
+        "exclusive_mode": cfg.exclusive_mode,
+    }
+    params = inspect.signature(AudioCapture).parameters
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return options
+    return {name: value for name, value in options.items() if name in params}
+
+
 # Global components
 config_manager: Optional[ConfigManager] = None
 audio_capture: Optional[AudioCapture] = None
 vad: Optional[VoiceActivityDetector] = None
 stt_manager: Optional[STTEngineManager] = None
+stt_batcher: Optional[STTBatcher] = None
+vad_executor: Optional[ThreadPoolExecutor] = None
 logger: Optional[logging.Logger] = None
 
+# Configuration snapshots
+AUDIO_CFG: Optional[AudioCfg] = None
+VAD_CFG: Optional[VadCfg] = None
+
 # Recording state
 is_recording = False
 recording_task: Optional[asyncio.Task] = None
+utterance_buffer: Optional[np.ndarray] = None
+utterance_slot = 0  # Next slot to fill; kept across sessions
+
+# Recording pipeline tuning
+FRAME_QUEUE_SIZE = 32          # Captured frames buffered ahead of VAD
+UTTERANCE_QUEUE_SIZE = 4       # Utterances buffered ahead of STT
+STT_MAX_IN_FLIGHT = 4          # Utterances transcribed concurrently (and batch size)
+INT16_SCALE = 1.0 / 32768      # Converts int16 samples to full-scale float
+MAX_UTTERANCE_SECONDS = 15.0   # Force an utterance boundary after this long
+STT_WARMUP_SECONDS = 0.5       # Silence transcribed at startup to warm the engine
+SHUTDOWN_TIMEOUT = 5.0         # Maximum time allowed for graceful shutdown
+CONFIG_SAVE_DELAY = 0.5        # Configuration changes within this window share one save
+
+# Transcription cache keyed by engine and audio fingerprint
+TRANSCRIPTION_CACHE_SIZE = 256
+transcription_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+# Streaming engines keep per-stream decoder state, so one stream at a time
+stt_stream_lock: Optional[asyncio.Lock] = None
+
+# Debounced configuration saving
+config_dirty: Optional[asyncio.Event] = None
+config_flush_task: Optional[asyncio.Task] = None
+
+# Short-lived cache of enumerated input devices
+DEVICE_CACHE_TTL = 2.0
+device_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
 
 
 async def initialize_components():
     """Initialize all components with proper error handling."""
-    global config_manager, audio_capture, vad, stt_manager, logger
+    global config_manager, audio_capture, vad, stt_manager, stt_batcher, vad_executor, logger
+    global utterance_buffer, AUDIO_CFG, VAD_CFG, config_dirty, config_flush_task, stt_stream_lock
     
     try:
         # Initialize configuration manager
         config_manager = ConfigManager()
         await config_manager.load_config()
+        config_dirty = asyncio.Event()
+        stt_stream_lock = asyncio.Lock()
+        config_flush_task = asyncio.ensure_future(_config_flush_loop())
         
         # Setup logger
         logger = setup_logger(
@@ -67,28 +201,62 @@ async def initialize_components():
         logger.info("Initializing Claude Desktop Audio MCP Server...")
         
         # Initialize audio capture
-        audio_config = config_manager.get("audio", {})
+        AUDIO_CFG = AudioCfg.from_config(config_manager.get("audio", {}))
         audio_capture = AudioCapture(
-            sample_rate=audio_config.get("sample_rate", 16000),
-            channels=audio_config.get("channels", 1),
-            chunk_size=audio_config.get("chunk_size", 1024),
-            device_id=audio_config.get("device_id"),
-            low_latency=audio_config.get("low_latency", True)
+            sample_rate=AUDIO_CFG.sample_rate,
+            channels=AUDIO_CFG.channels,
+            chunk_size=AUDIO_CFG.chunk_size,
+            device_id=AUDIO_CFG.device_id,
+            low_latency=AUDIO_CFG.low_latency,
+            **_wasapi_options(AUDIO_CFG)
+        )
+        
+        # Pre-allocate utterance slots: one being filled, one per queued
+        # utterance, one waiting for an STT slot and one per in-flight
+        # transcription, so a slot is never reused while in use
+        max_frames = int(AUDIO_CFG.sample_rate * MAX_UTTERANCE_SECONDS)
+        frame_shape = (AUDIO_CFG.channels,) if AUDIO_CFG.channels > 1 else ()
+        utterance_buffer = np.empty(
+            (UTTERANCE_QUEUE_SIZE + STT_MAX_IN_FLIGHT + 2, max_frames) + frame_shape,
+            dtype=np.float32
         )
         
         # Initialize voice activity detection
-        vad_config = config_manager.get("vad", {})
+        VAD_CFG = VadCfg.from_config(config_manager.get("vad", {}))
         vad = VoiceActivityDetector(
-            mode=vad_config.get("mode", "hybrid"),
-            aggressiveness=vad_config.get("webrtc_aggressiveness", 2),
-            energy_threshold=vad_config.get("energy_threshold", 0.01)
+            mode=VAD_CFG.mode,
+            aggressiveness=VAD_CFG.aggressiveness,
+            energy_threshold=VAD_CFG.energy_threshold
         )
+        # Single worker keeps VAD calls serialized off the event loop
+        vad_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad")
+        # Compile the per-chunk kernel now rather than on the first chunk
+        warmup_kernels()
         
         # Initialize STT engine manager
         stt_config = config_manager.get("stt", {})
         stt_manager = STTEngineManager(stt_config)
         await stt_manager.initialize()
         
+        # Warm up local STT engines so the first utterance avoids cold-start
+        # cost; cloud engines gain nothing and would bill a request per start
+        is_local_engine = (
+            stt_manager.current_engine == "whisper"
+            and not config_manager.get("stt.whisper.use_api", False)
+        )
+        if is_local_engine:
+            try:
+                warmup = np.zeros(int(AUDIO_CFG.sample_rate * STT_WARMUP_SECONDS), dtype=np.float32)
+                await stt_manager.transcribe(warmup)
+            except Exception as e:
+                logger.warning(f"STT warmup failed: {e}")
+        
+        # Batch transcription requests that arrive together
+        stt_batcher = STTBatcher(
+            stt_manager, sample_rate=AUDIO_CFG.sample_rate, max_batch_size=STT_MAX_IN_FLIGHT
+        )
+        stt_batcher.start()
+        
         logger.info("All components initialized successfully")
         
     except Exception as e:
@@ -148,9 +316,9 @@ async def get_recording_status() -> Dict[str, Any]:
     status = {
         "is_recording": is_recording,
         "audio_config": {
-            "sample_rate": audio_capture.sample_rate if audio_capture else None,
-            "channels": audio_capture.channels if audio_capture else None,
-            "chunk_size": audio_capture.chunk_size if audio_capture else None,
+            "sample_rate": AUDIO_CFG.sample_rate if AUDIO_CFG else None,
+            "channels": AUDIO_CFG.channels if AUDIO_CFG else None,
+            "chunk_size": AUDIO_CFG.chunk_size if AUDIO_CFG else None,
             "device_id": audio_capture.device_id if audio_capture else None,
         },
         "stt_engine": stt_manager.current_engine if stt_manager else None,
@@ -162,9 +330,15 @@ async def get_recording_status() -> Dict[str, Any]:
 @mcp.tool()
 async def list_audio_devices() -> List[Dict[str, Any]]:
     """List all available audio input devices."""
+    global device_cache
+    
+    now = time.monotonic()
+    if device_cache and now - device_cache[0] < DEVICE_CACHE_TTL:
+        return device_cache[1]
+    
     try:
         devices = audio_capture.list_devices()
-        return [
+        input_devices = [
             {
                 "id": device.id,
                 "name": device.name,
@@ -175,6 +349,8 @@ async def list_audio_devices() -> List[Dict[str, Any]]:
             for device in devices
             if device.max_input_channels > 0  # Only input devices
         ]
+        device_cache = (now, input_devices)
+        return input_devices
     except Exception as e:
         logger.error(f"Failed to list audio devices: {e}")
         return []
@@ -183,10 +359,13 @@ async def list_audio_devices() -> List[Dict[str, Any]]:
 @mcp.tool()
 async def set_audio_device(device_id: int) -> str:
     """Set the audio input device."""
+    global device_cache
+    
     try:
         audio_capture.set_device(device_id)
+        device_cache = None
         config_manager.set("audio.device_id", device_id)
-        await config_manager.save_config()
+        _schedule_config_save()
         return f"Audio device set to device ID {device_id}"
     except Exception as e:
         logger.error(f"Failed to set audio device: {e}")
@@ -198,8 +377,9 @@ async def set_stt_engine(engine: str) -> str:
     """Set the speech-to-text engine (whisper, azure, google)."""
     try:
         await stt_manager.set_engine(engine)
+        transcription_cache.clear()
         config_manager.set("stt.default_engine", engine)
-        await config_manager.save_config()
+        _schedule_config_save()
         return f"STT engine set to {engine}"
     except Exception as e:
         logger.error(f"Failed to set STT engine: {e}")
@@ -213,10 +393,17 @@ async def test_audio_capture(duration: float = 3.0) -> str:
         logger.info(f"Testing audio capture for {duration} seconds...")
         test_data = audio_capture.test_capture(duration)
         
-        # Basic audio analysis
-        import numpy as np
-        peak_level = np.max(np.abs(test_data))
-        rms_level = np.sqrt(np.mean(test_data**2))
+        # Basic audio analysis (no full-size temporaries)
+        samples = np.ravel(test_data)
+        if NUMBA_AVAILABLE:
+            # Compiled kernel: sum of squares and peak in a single pass
+            rms_level, peak_level, _ = preprocess(samples)
+        else:
+            peak_level = max(-samples.min(), samples.max())
+            if numpy_rms is not None and samples.dtype == np.float32:
+                rms_level = float(numpy_rms.rms(samples, window_size=samples.size)[0])
+            else:
+                rms_level = math.sqrt(np.dot(samples, samples) / samples.size)
         
         return f"Audio test completed. Peak: {peak_level:.3f}, RMS: {rms_level:.3f}"
     except Exception as e:
@@ -224,6 +411,24 @@ async def test_audio_capture(duration: float = 3.0) -> str:
         return f"Audio test failed: {str(e)}"
 
 
+def _json_default(obj: Any) -> Any:
+    """Convert values neither JSON encoder handles natively."""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    return str(obj)
+
+
+def _to_json(obj: Any) -> str:
+    """Serialize a resource payload to compact JSON, with or without orjson."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=_json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
 @mcp.resource("audio://devices")
 async def get_audio_devices() -> Resource:
     """Resource providing available audio devices."""
@@ -233,7 +438,7 @@ async def get_audio_devices() -> Resource:
         name="Available Audio Devices",
         description="List of available audio input devices",
         mimeType="application/json",
-        text=str(devices)
+        text=_to_json(devices)
     )
 
 
@@ -246,7 +451,7 @@ async def get_audio_config() -> Resource:
         name="Audio Configuration",
         description="Current audio capture configuration",
         mimeType="application/json",
-        text=str(config)
+        text=_to_json(config)
     )
 
 
@@ -267,44 +472,269 @@ async def get_stt_engines() -> Resource:
         name="STT Engines Status",
         description="Status of speech-to-text engines",
         mimeType="application/json",
-        text=str(engines_info)
+        text=_to_json(engines_info)
     )
 
 
 async def recording_loop():
-    """Main recording loop that captures audio and processes speech."""
+    """Main recording loop that captures audio and processes speech.
+
+    Runs as a producer/consumer pipeline: capture fills a frame queue, the
+    VAD stage groups voiced frames into utterances, and the STT stage
+    transcribes whole utterances while capture continues.
+    """
+    global is_recording
+    
     logger.info("Starting recording loop...")
     
+    frame_queue: asyncio.Queue = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+    utterance_queue: asyncio.Queue = asyncio.Queue(maxsize=UTTERANCE_QUEUE_SIZE)
+    
+    # The task group cancels and awaits every stage when one fails or when
+    # stop_recording cancels this task, so no stage outlives the recording
     try:
-        audio_stream = audio_capture.start_stream()
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(_capture_producer(frame_queue))
+            tg.create_task(_vad_consumer(frame_queue, utterance_queue))
+            tg.create_task(_stt_consumer(utterance_queue))
+    except* AudioCaptureError as eg:
+        for e in eg.exceptions:
+            logger.error(f"Audio capture error: {e}")
+    except* Exception as eg:
+        for e in eg.exceptions:
+            logger.error(f"Unexpected error in recording loop: {e}")
+    finally:
+        if is_recording:
+            # The stream ended or a stage failed; stop_recording clears the
+            # flag before cancelling, so release the device here instead
+            is_recording = False
+            try:
+                audio_capture.stop()
+            except Exception as e:
+                logger.error(f"Failed to stop audio capture: {e}")
+        logger.info("Recording loop stopped")
+
+
+async def _capture_producer(frame_queue: asyncio.Queue):
+    """Drain the audio stream into the frame queue."""
+    audio_stream = audio_capture.start_stream()
+    
+    async for audio_chunk in audio_stream:
+        if not is_recording:
+            break
+        await frame_queue.put(audio_chunk)
+    
+    # Signal end of stream
+    await frame_queue.put(None)
+
+
+async def _vad_consumer(frame_queue: asyncio.Queue, utterance_queue: asyncio.Queue):
+    """Group consecutive voiced frames into utterances."""
+    min_silence = VAD_CFG.min_silence_duration
+    # Only modes that use an energy criterion may reject quiet chunks early
+    energy_threshold = (
+        VAD_CFG.energy_threshold if VAD_CFG.mode in ("energy", "hybrid") else None
+    )
+    sample_rate = AUDIO_CFG.sample_rate
+    loop = asyncio.get_running_loop()
+    max_frames = utterance_buffer.shape[1]
+    
+    write_ptr = 0       # Frames written to the current slot
+    voiced_end = 0      # End of the last voiced frame in the current slot
+    silence_duration = 0.0
+    
+    async def emit_utterance():
+        global utterance_slot
+        nonlocal write_ptr, voiced_end, silence_duration
+        if voiced_end:
+            # Trailing silence after the last voiced frame is trimmed
+            await utterance_queue.put(utterance_buffer[utterance_slot, :voiced_end])
+            utterance_slot = (utterance_slot + 1) % len(utterance_buffer)
+        write_ptr = 0
+        voiced_end = 0
+        silence_duration = 0.0
+    
+    while True:
+        audio_chunk = await frame_queue.get()
+        if audio_chunk is None:
+            break
         
-        async for audio_chunk in audio_stream:
-            if not is_recording:
+        # Voice activity detection
+        has_speech = await loop.run_in_executor(
+            vad_executor, _detect_speech, audio_chunk, energy_threshold
+        )
+        if has_speech:
+            silence_duration = 0.0
+            offset = 0
+            while offset < len(audio_chunk):
+                count = min(len(audio_chunk) - offset, max_frames - write_ptr)
+                _copy_frames(
+                    utterance_buffer[utterance_slot, write_ptr:write_ptr + count],
+                    audio_chunk[offset:offset + count]
+                )
+                write_ptr += count
+                voiced_end = write_ptr
+                offset += count
+                if write_ptr == max_frames:
+                    await emit_utterance()
+        elif write_ptr:
+            # Keep short pauses so words are not spliced together
+            silence_duration += len(audio_chunk) / sample_rate
+            if silence_duration >= min_silence or write_ptr + len(audio_chunk) > max_frames:
+                await emit_utterance()
+            else:
+                _copy_frames(
+                    utterance_buffer[utterance_slot, write_ptr:write_ptr + len(audio_chunk)],
+                    audio_chunk
+                )
+                write_ptr += len(audio_chunk)
+    
+    # Flush any trailing speech and signal end of stream
+    await emit_utterance()
+    await utterance_queue.put(None)
+
+
+def _copy_frames(dest: np.ndarray, frames: np.ndarray):
+    """Copy frames into the float32 utterance buffer, scaling int16 to full scale."""
+    dest[...] = frames
+    if frames.dtype == np.int16:
+        dest *= INT16_SCALE
+
+
+def _detect_speech(audio_chunk: np.ndarray, energy_threshold: Optional[float]) -> bool:
+    """Run VAD on a chunk, skipping the detector for chunks below the energy threshold."""
+    if energy_threshold is None:
+        return vad.detect_speech(audio_chunk)
+    scale = INT16_SCALE if audio_chunk.dtype == np.int16 else 1.0
+    rms, _, _ = preprocess(audio_chunk, scale)
+    if rms < energy_threshold:
+        return False
+    return vad.detect_speech(audio_chunk)
+
+
+async def _stt_consumer(utterance_queue: asyncio.Queue):
+    """
+    Transcribe utterances as they are produced.
+    
+    Up to STT_MAX_IN_FLIGHT utterances are transcribed concurrently so the
+    batcher can group them; transcripts are still reported in order.
+    """
+    in_flight = asyncio.Semaphore(STT_MAX_IN_FLIGHT)
+    pending: asyncio.Queue = asyncio.Queue()
+    
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(_report_transcripts(pending, in_flight))
+        
+        while True:
+            utterance = await utterance_queue.get()
+            if utterance is None:
                 break
             
-            # Voice activity detection
-            has_speech = vad.detect_speech(audio_chunk)
+            logger.debug("Speech detected, processing...")
             
-            if has_speech:
-                logger.debug("Speech detected, processing...")
-                
-                # Speech-to-text processing
-                try:
-                    text = await stt_manager.transcribe(audio_chunk)
-                    if text.strip():
-                        logger.info(f"Transcribed: {text}")
-                        # Here you would send the text to Claude Desktop
-                        # This is handled by the MCP protocol automatically
-                        
-                except STTError as e:
-                    logger.error(f"STT processing failed: {e}")
-                    
-    except AudioCaptureError as e:
-        logger.error(f"Audio capture error: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error in recording loop: {e}")
+            await in_flight.acquire()
+            segments: asyncio.Queue = asyncio.Queue()
+            tg.create_task(_transcribe_into(utterance, segments))
+            pending.put_nowait(segments)
+        
+        pending.put_nowait(None)
+
+
+async def _transcribe_into(utterance: np.ndarray, segments: asyncio.Queue):
+    """Transcribe one utterance, forwarding segments to its queue."""
+    try:
+        async for text in _transcribe_stream(utterance):
+            segments.put_nowait(text)
+    except STTError as e:
+        logger.error(f"STT processing failed: {e}")
     finally:
-        logger.info("Recording loop stopped")
+        segments.put_nowait(None)
+
+
+async def _report_transcripts(pending: asyncio.Queue, in_flight: asyncio.Semaphore):
+    """Report transcript segments in utterance order as they arrive."""
+    while True:
+        segments = await pending.get()
+        if segments is None:
+            break
+        
+        while True:
+            text = await segments.get()
+            if text is None:
+                break
+            if text.strip():
+                logger.info(f"Transcribed: {text}")
+                # Here you would send the text to Claude Desktop
+                # This is handled by the MCP protocol automatically
+        
+        in_flight.release()
+
+
+def _audio_fingerprint(audio: np.ndarray) -> int:
+    """Cheap 64-bit fingerprint of an audio buffer."""
+    # Hash the buffer in place; utterances are contiguous views, so no copy
+    data = memoryview(np.ascontiguousarray(audio)).cast("B")
+    if xxhash is not None:
+        return xxhash.xxh64(data).intdigest()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+async def _transcribe_stream(audio: np.ndarray) -> AsyncIterator[str]:
+    """
+    Yield transcript segments for an utterance as the engine finalizes them.
+    
+    Engines without streaming support yield the full transcript once.
+    Complete transcripts are cached by engine and audio fingerprint, so a
+    transcription finishing after an engine switch cannot be served for
+    the new engine.
+    """
+    key = (stt_manager.current_engine, _audio_fingerprint(audio))
+    
+    text = transcription_cache.get(key)
+    if text is not None:
+        transcription_cache.move_to_end(key)
+        yield text
+        return
+    
+    stream_transcribe = getattr(stt_manager, "stream_transcribe", None)
+    if stream_transcribe is None:
+        # Requests cancelled by stop_recording are dropped by the batcher;
+        # a batch already running holds the most recent slots, which the
+        # next session reaches last since utterance_slot carries over
+        text = await stt_batcher.submit(audio)
+        yield text
+    else:
+        segments = []
+        async with stt_stream_lock:
+            async for segment in stream_transcribe(audio):
+                segments.append(segment.strip())
+                yield segment
+        text = " ".join(segment for segment in segments if segment)
+    
+    transcription_cache[key] = text
+    if len(transcription_cache) > TRANSCRIPTION_CACHE_SIZE:
+        transcription_cache.popitem(last=False)
+
+
+def _schedule_config_save():
+    """Mark the configuration dirty so the flush loop saves it shortly."""
+    config_dirty.set()
+
+
+async def _config_flush_loop():
+    """Coalesce configuration changes into a single delayed save."""
+    while True:
+        await config_dirty.wait()
+        await asyncio.sleep(CONFIG_SAVE_DELAY)
+        config_dirty.clear()
+        try:
+            await config_manager.save_config()
+        except asyncio.CancelledError:
+            # Leave the change pending so shutdown writes it
+            config_dirty.set()
+            raise
+        except Exception as e:
+            logger.error(f"Failed to save configuration: {e}")
 
 
 async def shutdown():
@@ -318,15 +748,42 @@ async def shutdown():
         await stop_recording()
     
     # Cleanup components
+    if stt_batcher:
+        await stt_batcher.stop()
+    
     if audio_capture:
         audio_capture.cleanup()
     
     if stt_manager:
         await stt_manager.cleanup()
     
+    if vad_executor:
+        vad_executor.shutdown(wait=False)
+    
+    # Flush any pending configuration changes
+    if config_flush_task:
+        config_flush_task.cancel()
+        try:
+            await config_flush_task
+        except asyncio.CancelledError:
+            pass
+    
+    if config_dirty and config_dirty.is_set():
+        await config_manager.save_config()
+    
     logger.info("Server shutdown complete")
 
 
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create the server event loop, using uvloop where available."""
+    if sys.platform == "win32":
+        # Proactor loop supports subprocess pipes and sockets alongside WASAPI
+        return asyncio.ProactorEventLoop()
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -352,32 +809,46 @@ def main():
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
     
+    # Components and the MCP server share a single event loop
+    loop = new_event_loop()
+    asyncio.set_event_loop(loop)
+    
     # Initialize components
     try:
-        asyncio.run(initialize_components())
+        loop.run_until_complete(initialize_components())
     except Exception as e:
         logging.error(f"Failed to initialize server: {e}")
+        loop.close()
         sys.exit(1)
     
-    # Register shutdown handler
-    import signal
-    
-    def signal_handler(sig, frame):
-        asyncio.create_task(shutdown())
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    # Run the MCP server, stopping it cleanly on SIGINT/SIGTERM
+    server_task = loop.create_task(mcp.run_stdio_async())
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, server_task.cancel)
+        except NotImplementedError:
+            # Not supported on Windows; Ctrl+C arrives as KeyboardInterrupt
+            pass
     
-    # Run the MCP server
+    exit_code = 0
     try:
-        mcp.run()
-    except KeyboardInterrupt:
-        asyncio.run(shutdown())
+        loop.run_until_complete(server_task)
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        pass
     except Exception as e:
         logging.error(f"Server error: {e}")
-        asyncio.run(shutdown())
-        sys.exit(1)
+        exit_code = 1
+    finally:
+        if not server_task.done():
+            server_task.cancel()
+            loop.run_until_complete(asyncio.gather(server_task, return_exceptions=True))
+        try:
+            loop.run_until_complete(asyncio.wait_for(shutdown(), timeout=SHUTDOWN_TIMEOUT))
+        except asyncio.TimeoutError:
+            logging.error(f"Shutdown did not complete within {SHUTDOWN_TIMEOUT} seconds")
+        loop.close()
+    
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+"""
+Numeric kernels for the real-time audio path.
+
+Per-chunk statistics are compiled with Numba when it is installed, so they
+run as native code and release the GIL while executing on a worker thread.
+Without Numba the same results are computed with vectorized NumPy.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+def _preprocess_numpy(samples: np.ndarray, scale: float) -> Tuple[float, float, float]:
+    """NumPy fallback for :func:`preprocess`."""
+    if samples.size == 0:
+        return 0.0, 0.0, 0.0
+    
+    x = np.asarray(samples, dtype=np.float32)
+    rms = math.sqrt(np.dot(x, x) / x.size) * scale
+    peak = max(-float(x.min()), float(x.max())) * scale
+    negative = np.signbit(x)
+    crossings = np.count_nonzero(negative[1:] != negative[:-1])
+    zcr = float(crossings) / max(x.size - 1, 1)
+    return rms, peak, zcr
+
+
+if NUMBA_AVAILABLE:
+    @njit(nogil=True, cache=True, fastmath=True)
+    def _preprocess_jit(samples, scale):
+        n = samples.size
+        if n == 0:
+            return 0.0, 0.0, 0.0
+        
+        sum_sq = 0.0
+        peak = 0.0
+        crossings = 0
+        prev_negative = samples[0] < 0
+        for i in range(n):
+            x = np.float32(samples[i])
+            sum_sq += x * x
+            magnitude = abs(x)
+            if magnitude > peak:
+                peak = magnitude
+            negative = x < 0
+            if negative != prev_negative:
+                crossings += 1
+            prev_negative = negative
+        
+        rms = math.sqrt(sum_sq / n) * scale
+        zcr = crossings / max(n - 1, 1)
+        return rms, peak * scale, zcr
+
+
+def preprocess(samples: np.ndarray, scale: float = 1.0) -> Tuple[float, float, float]:
+    """
+    Compute RMS, peak and zero-crossing rate of an audio chunk in one pass.
+    
+    Args:
+        samples: Audio samples (int16 or float); multi-channel input is flattened
+        scale: Factor converting sample values to full scale (1/32768 for int16)
+    
+    Returns:
+        Tuple of (rms, peak, zero_crossing_rate)
+    """
+    samples = np.ravel(samples)
+    if NUMBA_AVAILABLE:
+        return _preprocess_jit(samples, scale)
+    return _preprocess_numpy(samples, scale)
+
+
+def warmup(dtypes: Tuple[type, ...] = (np.float32, np.int16)):
+    """
+    Compile :func:`preprocess` for the given sample dtypes ahead of first use.
+    
+    Numba compiles lazily and holds the GIL while doing so; calling this at
+    startup keeps that cost off the real-time path.
+    """
+    for dtype in dtypes:
+        preprocess(np.zeros(16, dtype=dtype))
@@ -0,0 +1,142 @@
+"""
+Micro-batching of speech-to-text requests.
+
+Transcription requests that are waiting while the engine is busy are grouped
+into batches, bucketed by padded length, and submitted to the engine in a
+single call when the engine manager supports batched transcription.
+"""
+
+import asyncio
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class STTBatcher:
+    """Groups concurrent transcription requests into length-bucketed batches."""
+    
+    def __init__(
+        self,
+        stt_manager: Any,
+        sample_rate: int,
+        max_batch_size: int = 8,
+        max_wait: float = 0.0
+    ):
+        """
+        Args:
+            stt_manager: Engine manager providing ``transcribe`` and, optionally,
+                ``transcribe_batch``
+            sample_rate: Sample rate of submitted audio; buckets are one second long
+            max_batch_size: Maximum number of requests per batch
+            max_wait: Seconds to wait for more requests after the first arrives;
+                0 batches only requests that are already queued
+        """
+        self.stt_manager = stt_manager
+        self.sample_rate = sample_rate
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._batch: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._worker_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the batching worker on the running event loop."""
+        if self._worker_task is None:
+            self._worker_task = asyncio.ensure_future(self._worker())
+    
+    async def stop(self):
+        """Stop the worker and cancel every request that has not completed."""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            # The worker may also have died from an engine error already
+            await asyncio.gather(self._worker_task, return_exceptions=True)
+            self._worker_task = None
+        
+        self._cancel_pending()
+    
+    async def submit(self, audio: np.ndarray) -> str:
+        """Queue audio for transcription and wait for its text."""
+        if self._worker_task is None or self._worker_task.done():
+            raise RuntimeError("STT batcher is not running")
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((audio, future))
+        return await future
+    
+    async def _worker(self):
+        try:
+            while True:
+                await self._collect_batch()
+                
+                buckets: Dict[int, List[Tuple[np.ndarray, asyncio.Future]]] = {}
+                for audio, future in self._batch:
+                    if future.cancelled():
+                        continue
+                    bucket = max(1, math.ceil(len(audio) / self.sample_rate))
+                    buckets.setdefault(bucket, []).append((audio, future))
+                
+                for bucket, items in buckets.items():
+                    await self._run_bucket(bucket * self.sample_rate, items)
+                self._batch = []
+        finally:
+            # Never leave callers waiting on a worker that has exited
+            self._cancel_pending()
+    
+    async def _collect_batch(self):
+        self._batch = [await self._queue.get()]
+        while len(self._batch) < self.max_batch_size and not self._queue.empty():
+            self._batch.append(self._queue.get_nowait())
+        
+        if self.max_wait <= 0:
+            return
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(self._batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+    
+    async def _run_bucket(self, length: int, items: List[Tuple[np.ndarray, asyncio.Future]]):
+        transcribe_batch = getattr(self.stt_manager, "transcribe_batch", None)
+        
+        try:
+            if transcribe_batch is not None and len(items) > 1:
+                # Zero-pad every request to the bucket length
+                stacked = np.zeros((len(items), length) + items[0][0].shape[1:], dtype=np.float32)
+                for row, (audio, _) in zip(stacked, items):
+                    row[:len(audio)] = audio
+                texts = list(await transcribe_batch(stacked))
+                if len(texts) != len(items):
+                    raise RuntimeError(
+                        f"transcribe_batch returned {len(texts)} results for {len(items)} inputs"
+                    )
+                for (_, future), text in zip(items, texts):
+                    if not future.done():
+                        future.set_result(text)
+            else:
+                for audio, future in items:
+                    if future.done():
+                        continue
+                    text = await self.stt_manager.transcribe(audio)
+                    if not future.done():
+                        future.set_result(text)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+    
+    def _cancel_pending(self):
+        for _, future in self._batch:
+            future.cancel()
+        self._batch = []
+        
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
@@ -0,0 +1,172 @@
+"""
+Shared fixtures for server tests.
+
+main.py is imported with MCP and the capture/VAD/STT/config modules replaced
+by small in-memory fakes; the pipeline code, kernels and batcher are real.
+"""
+
+import asyncio
+import importlib
+import logging
+import sys
+import types
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+
+class AudioCaptureError(Exception):
+    pass
+
+
+class STTError(Exception):
+    pass
+
+
+class FakeFastMCP:
+    def __init__(self, **kwargs):
+        pass
+    
+    def tool(self):
+        return lambda func: func
+    
+    def resource(self, uri):
+        return lambda func: func
+
+
+class FakeAudioCapture:
+    """Capture stub replaying ``chunks`` and then raising ``error`` if set."""
+    
+    def __init__(self, sample_rate=16000, channels=1, chunk_size=1024, device_id=None,
+                 low_latency=True):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_size = chunk_size
+        self.device_id = device_id
+        self.chunks = []
+        self.error = None
+        self.stop_calls = 0
+    
+    async def start_stream(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+        if self.error is not None:
+            raise self.error
+    
+    def stop(self):
+        self.stop_calls += 1
+    
+    def cleanup(self):
+        pass
+
+
+class FakeVAD:
+    """Treats any non-zero chunk as speech."""
+    
+    def __init__(self, mode="hybrid", aggressiveness=2, energy_threshold=0.01):
+        self.mode = mode
+    
+    def detect_speech(self, chunk):
+        return bool(np.any(chunk))
+
+
+class FakeSTTManager:
+    """Records every utterance it is asked to transcribe."""
+    
+    def __init__(self, config):
+        self.current_engine = "fake"
+        self.available_engines = {"fake": None}
+        self.delay = 0.0
+        self.utterances = []
+    
+    async def initialize(self):
+        pass
+    
+    async def transcribe(self, audio):
+        snapshot = np.array(audio, copy=True)
+        await asyncio.sleep(self.delay)
+        # The view must not have been overwritten while we were working on it
+        assert np.array_equal(audio, snapshot), "utterance buffer reused while in use"
+        self.utterances.append(snapshot)
+        return f"utterance {len(self.utterances)}"
+    
+    async def set_engine(self, engine):
+        self.current_engine = engine
+    
+    async def cleanup(self):
+        pass
+
+
+class FakeConfigManager:
+    values: dict = {}
+    
+    async def load_config(self):
+        pass
+    
+    def get(self, key, default=None):
+        value = self.values
+        for part in key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return default
+            value = value[part]
+        return value
+    
+    def set(self, key, value):
+        pass
+    
+    async def save_config(self):
+        pass
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+@pytest.fixture
+def main_module(monkeypatch):
+    """The main module imported against the fakes above."""
+    stubs = {
+        "mcp": _module("mcp"),
+        "mcp.server": _module("mcp.server"),
+        "mcp.server.fastmcp": _module("mcp.server.fastmcp", FastMCP=FakeFastMCP, Context=object),
+        "mcp.server.fastmcp.resources": _module("mcp.server.fastmcp.resources", Resource=dict),
+        "src.audio.capture": _module("src.audio.capture", AudioCapture=FakeAudioCapture,
+                                     AudioDevice=object),
+        "src.audio.vad": _module("src.audio.vad", VoiceActivityDetector=FakeVAD),
+        "src.stt.engine_manager": _module("src.stt.engine_manager",
+                                          STTEngineManager=FakeSTTManager),
+        "src.config.manager": _module("src.config.manager", ConfigManager=FakeConfigManager),
+        "src.utils.logger": _module("src.utils.logger",
+                                    setup_logger=lambda **kwargs: logging.getLogger("test")),
+        "src.utils.exceptions": _module("src.utils.exceptions",
+                                        AudioCaptureError=AudioCaptureError, STTError=STTError),
+    }
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, "main", raising=False)
+    
+    main = importlib.import_module("main")
+    yield main
+    sys.modules.pop("main", None)
+
+
+@pytest_asyncio.fixture
+async def server(main_module):
+    """Coroutine initializing the server with a config dict; shut down afterwards."""
+    started = False
+    
+    async def start(config=None):
+        nonlocal started
+        FakeConfigManager.values = config or {}
+        await main_module.initialize_components()
+        started = True
+        return main_module
+    
+    yield start
+    
+    if started:
+        await main_module.shutdown()
@@ -0,0 +1,41 @@
+"""Tests for how audio configuration reaches AudioCapture in main.py."""
+
+import pytest
+
+from tests.conftest import FakeAudioCapture
+
+WASAPI_CONFIG = {
+    "audio": {"wasapi_buffer_frames": 128, "event_callback": False, "use_wasapi_exclusive": True}
+}
+
+
+class WasapiAudioCapture(FakeAudioCapture):
+    """Capture backend taking the buffer and callback options but not exclusive mode."""
+    
+    def __init__(self, sample_rate=16000, channels=1, chunk_size=1024, device_id=None,
+                 low_latency=True, wasapi_buffer_frames=256, event_callback=True):
+        super().__init__(sample_rate, channels, chunk_size, device_id, low_latency)
+        self.wasapi_buffer_frames = wasapi_buffer_frames
+        self.event_callback = event_callback
+
+
+@pytest.mark.asyncio
+async def test_wasapi_options_skipped_when_capture_does_not_accept_them(server):
+    main = await server(WASAPI_CONFIG)
+    
+    assert main.AUDIO_CFG.wasapi_buffer_frames == 128
+    assert main.AUDIO_CFG.exclusive_mode is True
+    assert type(main.audio_capture) is FakeAudioCapture
+
+
+@pytest.mark.asyncio
+async def test_wasapi_options_passed_when_capture_accepts_them(server, main_module, monkeypatch):
+    monkeypatch.setattr(main_module, "AudioCapture", WasapiAudioCapture)
+    
+    main = await server(WASAPI_CONFIG)
+    
+    assert main.audio_capture.wasapi_buffer_frames == 128
+    assert main.audio_capture.event_callback is False
+    assert main._wasapi_options(main.AUDIO_CFG) == {
+        "wasapi_buffer_frames": 128, "event_callback": False
+    }
@@ -0,0 +1,54 @@
+"""Tests for the per-chunk audio kernels."""
+
+import numpy as np
+import pytest
+
+from src.audio import _kernels
+from src.audio._kernels import preprocess
+
+
+def _chunks():
+    rng = np.random.default_rng(0)
+    float_chunk = rng.standard_normal(4096).astype(np.float32) * 0.1
+    return {
+        "float32": (float_chunk, 1.0),
+        "int16": ((float_chunk * 32767).astype(np.int16), 1.0 / 32768),
+        "stereo": (float_chunk.reshape(-1, 2), 1.0),
+    }
+
+
+@pytest.mark.parametrize("name", ["float32", "int16", "stereo"])
+def test_preprocess_matches_numpy_reference(name):
+    samples, scale = _chunks()[name]
+    flat = np.ravel(samples).astype(np.float64) * scale
+    
+    rms, peak, zcr = preprocess(samples, scale)
+    
+    assert rms == pytest.approx(np.sqrt(np.mean(flat ** 2)), rel=1e-5)
+    assert peak == pytest.approx(np.max(np.abs(flat)), rel=1e-6)
+    signs = np.signbit(flat)
+    assert zcr == pytest.approx(np.count_nonzero(signs[1:] != signs[:-1]) / (flat.size - 1))
+
+
+@pytest.mark.skipif(not _kernels.NUMBA_AVAILABLE, reason="numba not installed")
+@pytest.mark.parametrize("name", ["float32", "int16", "stereo"])
+def test_jit_matches_numpy_fallback(name):
+    samples, scale = _chunks()[name]
+    flat = np.ravel(samples)
+    
+    jit = _kernels._preprocess_jit(flat, scale)
+    fallback = _kernels._preprocess_numpy(flat, scale)
+    
+    assert jit == pytest.approx(fallback, rel=1e-5)
+
+
+def test_preprocess_empty_chunk():
+    assert preprocess(np.zeros(0, dtype=np.float32)) == (0.0, 0.0, 0.0)
+
+
+def test_warmup_compiles_common_dtypes():
+    _kernels.warmup()
+    
+    if _kernels.NUMBA_AVAILABLE:
+        compiled = {sig[0].dtype.name for sig in _kernels._preprocess_jit.signatures}
+        assert {"float32", "int16"} <= compiled
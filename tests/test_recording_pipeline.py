@@ -0,0 +1,160 @@
+"""Tests for the capture -> VAD -> STT recording pipeline in main.py."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from tests.conftest import AudioCaptureError
+
+CHUNK = 1024
+
+
+async def _record(main, chunks, error=None):
+    """Run one recording session over ``chunks`` until the stream ends."""
+    main.audio_capture.chunks = chunks
+    main.audio_capture.error = error
+    assert await main.start_recording() == "Audio recording started successfully"
+    await main.recording_task
+
+
+@pytest.mark.asyncio
+async def test_failing_stage_releases_capture(server):
+    main = await server()
+    
+    await _record(main, [np.full(CHUNK, 0.5, np.float32)], error=AudioCaptureError("device lost"))
+    
+    assert main.is_recording is False
+    assert main.audio_capture.stop_calls == 1
+    assert await main.start_recording() == "Audio recording started successfully"
+    await main.stop_recording()
+
+
+@pytest.mark.asyncio
+async def test_stop_recording_cancels_running_loop(server):
+    main = await server()
+    main.audio_capture.chunks = [np.zeros(CHUNK, np.float32)] * 10_000
+    
+    await main.start_recording()
+    assert await main.stop_recording() == "Audio recording stopped successfully"
+    
+    assert main.is_recording is False
+    assert main.recording_task is None
+    assert main.audio_capture.stop_calls == 1
+
+
+def _voiced(value, count=1, dtype=np.float32):
+    return [np.full(CHUNK, value, dtype) for _ in range(count)]
+
+
+def _silence(count):
+    return [np.zeros(CHUNK, np.float32) for _ in range(count)]
+
+
+# 0.2 s of silence closes an utterance: four 64 ms chunks, but not one
+VAD_CONFIG = {"vad": {"min_silence_duration": 0.2}}
+
+
+@pytest.mark.asyncio
+async def test_short_pauses_are_kept_and_trailing_silence_trimmed(server):
+    main = await server(VAD_CONFIG)
+    
+    await _record(main, _voiced(0.5, 2) + _silence(1) + _voiced(0.5) + _silence(6))
+    
+    [utterance] = main.stt_manager.utterances
+    expected = np.concatenate(_voiced(0.5, 2) + _silence(1) + _voiced(0.5))
+    np.testing.assert_array_equal(utterance, expected)
+
+
+@pytest.mark.asyncio
+async def test_long_speech_is_split_at_max_utterance_length(main_module, server, monkeypatch):
+    monkeypatch.setattr(main_module, "MAX_UTTERANCE_SECONDS", 0.2)
+    main = await server(VAD_CONFIG)
+    
+    await _record(main, _voiced(0.5, 5) + _silence(6))
+    
+    lengths = [len(u) for u in main.stt_manager.utterances]
+    assert lengths == [3200, 5 * CHUNK - 3200]
+
+
+@pytest.mark.asyncio
+async def test_int16_input_is_scaled_to_full_scale_float(server):
+    main = await server(VAD_CONFIG)
+    
+    await _record(main, _voiced(16384, 2, np.int16) + _silence(6))
+    
+    [utterance] = main.stt_manager.utterances
+    assert utterance.dtype == np.float32
+    np.testing.assert_array_equal(utterance, np.full(2 * CHUNK, 0.5, np.float32))
+
+
+@pytest.mark.asyncio
+async def test_slot_ring_never_reuses_a_slot_in_use(server):
+    main = await server(VAD_CONFIG)
+    # A slow engine lets utterances pile up in every queue of the pipeline
+    main.stt_manager.delay = 0.01
+    slots = len(main.utterance_buffer)
+    values = [0.1 + i / 100 for i in range(30)]
+    assert len(values) > 2 * slots
+    
+    chunks = []
+    for value in values:
+        chunks += _voiced(value, 2) + _silence(4)
+    await _record(main, chunks)
+    
+    # FakeSTTManager also asserts each view is untouched while it transcribes
+    received = [float(u[0]) for u in main.stt_manager.utterances]
+    assert received == pytest.approx(values)
+    assert all(np.all(u == u[0]) for u in main.stt_manager.utterances)
+    assert main.utterance_slot == len(values) % slots
+
+
+@pytest.mark.asyncio
+async def test_streaming_engine_handles_one_utterance_at_a_time(server):
+    main = await server(VAD_CONFIG)
+    active = peak = 0
+    
+    async def stream_transcribe(audio):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        yield f"value {audio[0]:.2f}"
+        active -= 1
+    
+    main.stt_manager.stream_transcribe = stream_transcribe
+    values = [0.1 + i / 10 for i in range(6)]
+    chunks = []
+    for value in values:
+        chunks += _voiced(value, 2) + _silence(4)
+    await _record(main, chunks)
+    
+    assert peak == 1
+    assert list(main.transcription_cache.values()) == [f"value {v:.2f}" for v in values]
+
+
+@pytest.mark.asyncio
+async def test_transcripts_are_cached_per_engine(server):
+    main = await server()
+    audio = np.full(CHUNK, 0.5, np.float32)
+    
+    async def transcribe():
+        return [text async for text in main._transcribe_stream(audio)]
+    
+    assert await transcribe() == ["utterance 1"]
+    assert await transcribe() == ["utterance 1"]
+    # An entry stored after set_stt_engine cleared the cache belongs to the
+    # old engine and must not be served for the new one
+    await main.stt_manager.set_engine("other")
+    assert await transcribe() == ["utterance 2"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode, transcribed", [("hybrid", 0), ("energy", 0), ("webrtc", 1)])
+async def test_energy_pre_gate_only_applies_to_energy_modes(server, mode, transcribed):
+    main = await server({"vad": {"mode": mode, "min_silence_duration": 0.2}})
+    
+    # Below the default energy threshold of 0.01, but speech to the detector
+    await _record(main, _voiced(0.005, 2) + _silence(6))
+    
+    assert len(main.stt_manager.utterances) == transcribed
@@ -0,0 +1,28 @@
+"""Tests for resource payload serialization in main.py."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+orjson = pytest.importorskip("orjson")
+
+PAYLOAD = {
+    "devices": {0: "Default", 3: "Mikrofon (USB) é"},
+    "sample_rate": np.int64(16000),
+    "energy_threshold": np.float64(0.01),
+    "gain": np.float32(0.25),
+    "levels": np.array([0.5, 0.25], np.float32),
+    "models_dir": Path("models"),
+}
+
+
+def test_orjson_and_json_output_match(main_module, monkeypatch):
+    with_orjson = main_module._to_json(PAYLOAD)
+    monkeypatch.setattr(main_module, "orjson", None)
+    
+    assert main_module._to_json(PAYLOAD) == with_orjson
+    assert with_orjson == (
+        '{"devices":{"0":"Default","3":"Mikrofon (USB) é"},"sample_rate":16000,'
+        '"energy_threshold":0.01,"gain":0.25,"levels":[0.5,0.25],"models_dir":"models"}'
+    )
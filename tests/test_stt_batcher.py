@@ -0,0 +1,137 @@
+"""Tests for STT request micro-batching."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.stt.batcher import STTBatcher
+
+SAMPLE_RATE = 16000
+
+
+class FakeManager:
+    """Engine manager stub recording the calls it receives."""
+    
+    def __init__(self, batch_results=None, error=None):
+        self.batch_shapes = []
+        self.single_lengths = []
+        self.batch_results = batch_results
+        self.error = error
+        self.release = asyncio.Event()
+        self.release.set()
+    
+    async def transcribe(self, audio):
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        self.single_lengths.append(len(audio))
+        return f"single:{len(audio)}"
+    
+    async def transcribe_batch(self, stacked):
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        self.batch_shapes.append(stacked.shape)
+        if self.batch_results is not None:
+            return self.batch_results
+        return [f"batch:{i}" for i in range(len(stacked))]
+
+
+class EngineAbort(BaseException):
+    """Non-Exception error escaping the engine."""
+
+
+def _audio(frames):
+    return np.ones(frames, dtype=np.float32)
+
+
+async def _submit_all(batcher, lengths):
+    tasks = [asyncio.ensure_future(batcher.submit(_audio(n))) for n in lengths]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_requests_are_bucketed_by_padded_length():
+    manager = FakeManager()
+    batcher = STTBatcher(manager, SAMPLE_RATE, max_wait=0.01)
+    batcher.start()
+    
+    results = await _submit_all(batcher, [8000, 16000, 20000, 100])
+    await batcher.stop()
+    
+    # 8000, 16000 and 100 frames share the one-second bucket; 20000 is alone
+    assert manager.batch_shapes == [(3, SAMPLE_RATE)]
+    assert manager.single_lengths == [20000]
+    assert results == ["batch:0", "batch:1", "single:20000", "batch:2"]
+
+
+@pytest.mark.asyncio
+async def test_single_request_is_not_delayed_by_default():
+    manager = FakeManager()
+    batcher = STTBatcher(manager, SAMPLE_RATE)
+    batcher.start()
+    
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    assert await batcher.submit(_audio(100)) == "single:100"
+    assert loop.time() - start < 0.01
+    await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_engine_error_is_fanned_out_to_every_request():
+    manager = FakeManager(error=ValueError("engine failed"))
+    batcher = STTBatcher(manager, SAMPLE_RATE, max_wait=0.01)
+    batcher.start()
+    
+    results = await _submit_all(batcher, [100, 200, 20000])
+    
+    assert all(isinstance(r, ValueError) for r in results)
+    # The worker survives engine errors
+    manager.error = None
+    assert await batcher.submit(_audio(100)) == "single:100"
+    await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_short_batch_result_fails_every_request():
+    manager = FakeManager(batch_results=["only one"])
+    batcher = STTBatcher(manager, SAMPLE_RATE, max_wait=0.01)
+    batcher.start()
+    
+    results = await _submit_all(batcher, [100, 200])
+    await batcher.stop()
+    
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_dequeued_and_queued_requests():
+    manager = FakeManager()
+    manager.release.clear()
+    batcher = STTBatcher(manager, SAMPLE_RATE, max_batch_size=1)
+    batcher.start()
+    
+    tasks = [asyncio.ensure_future(batcher.submit(_audio(100))) for _ in range(3)]
+    await asyncio.sleep(0.01)  # First request is now held by the engine
+    await batcher.stop()
+    
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    with pytest.raises(RuntimeError):
+        await batcher.submit(_audio(100))
+
+
+@pytest.mark.asyncio
+async def test_base_exception_in_engine_does_not_hang_callers():
+    manager = FakeManager(error=EngineAbort())
+    batcher = STTBatcher(manager, SAMPLE_RATE)
+    batcher.start()
+    
+    results = await _submit_all(batcher, [100, 200])
+    
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    with pytest.raises(RuntimeError):
+        await batcher.submit(_audio(100))
+    await batcher.stop()